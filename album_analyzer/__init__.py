@@ -5,10 +5,10 @@ from typing import TYPE_CHECKING
 from .exporter import export_albums, load_albums
 from .models import AlbumListening
 from .parser import aggregate_archives, filter_by_minutes
-from .release_date import enrich_with_release_dates
 
 if TYPE_CHECKING:  # pragma: no cover - import for type checkers only
     from .cli import app as _cli_app
+    from .release_date import enrich_with_release_dates
 
     app = _cli_app
 
@@ -28,6 +28,11 @@ def __getattr__(name: str) -> object:
         from .cli import app as cli_app
 
         return cli_app
+    if name == "enrich_with_release_dates":
+        # Deferred so that importing the package does not pull in requests/sqlite3.
+        from .release_date import enrich_with_release_dates
+
+        return enrich_with_release_dates
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
@@ -0,0 +1,33 @@
+"""JSON encoding helpers backed by :mod:`orjson` when it is installed."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON from UTF-8 bytes or text."""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode ``obj`` as UTF-8 JSON bytes, optionally indented by two spaces.
+
+    ``default`` is called for objects the encoder does not support natively.
+    Dataclasses are always routed through it, and so are dates when the
+    stdlib encoder is in use.
+    """
+
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=default).encode("utf-8")
@@ -6,7 +6,7 @@ from typing import List
 import typer
 
 from .exporter import export_albums
-from .parser import aggregate_archives, filter_by_minutes
+from .parser import aggregate_archives
 from .release_date import enrich_with_release_dates
 
 app = typer.Typer(help="Utility for preparing album listening statistics")
@@ -22,8 +22,7 @@ def export(
 ) -> None:
     """Aggregate streaming history and export albums over the threshold."""
 
-    albums = aggregate_archives(archives)
-    filtered = filter_by_minutes(albums, minimum_minutes)
+    filtered = aggregate_archives(archives, minimum_minutes=minimum_minutes)
     if fetch_release_dates:
         filtered = enrich_with_release_dates(filtered, pause_seconds=pause)
     export_albums(filtered, output)
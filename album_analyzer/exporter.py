@@ -1,31 +1,58 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Iterable, Iterator, List
 
+from . import _json
 from .models import AlbumListening
 
 
-def _build_payload(albums: Iterable[AlbumListening]) -> dict:
-    return {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "albums": [album.to_dict() for album in albums],
-    }
+def _encode(obj: Any) -> Any:
+    """Encoder hook for album payloads; datetimes only reach it when the stdlib encoder is used."""
+
+    if isinstance(obj, AlbumListening):
+        return obj.to_dict()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _iter_payload_chunks(albums: Iterable[AlbumListening]) -> Iterator[bytes]:
+    """Yield the encoded payload piece by piece, one album per line, so it never exists as a whole."""
+
+    generated_at = _json.dumps(datetime.now(timezone.utc), default=_encode)
+    yield b'{\n  "generated_at": ' + generated_at + b',\n  "albums": ['
+    separator = b"\n    "
+    for album in albums:
+        yield separator + _json.dumps(album, default=_encode)
+        separator = b",\n    "
+    yield b"]\n}\n" if separator == b"\n    " else b"\n  ]\n}\n"
+
+
+def encode_albums(albums: Iterable[AlbumListening]) -> bytes:
+    """Return the UTF-8 encoded JSON representation of albums with metadata."""
+
+    return b"".join(_iter_payload_chunks(albums))
 
 
 def serialize_albums(albums: Iterable[AlbumListening]) -> str:
     """Return a JSON representation of albums with metadata."""
 
-    payload = _build_payload(albums)
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return encode_albums(albums).decode("utf-8")
 
 
 def export_albums(albums: Iterable[AlbumListening], output_path: Path) -> None:
-    output_path.write_text(serialize_albums(albums), encoding="utf-8")
+    with output_path.open("wb") as handle:
+        handle.writelines(_iter_payload_chunks(albums))
+
+
+def decode_albums(data: bytes | bytearray) -> List[AlbumListening]:
+    """Parse albums from an encoded payload, e.g. one received over the network."""
+
+    payload = _json.loads(data)
+    return [AlbumListening.from_dict(entry) for entry in payload.get("albums", [])]
 
 
 def load_albums(path: Path) -> List[AlbumListening]:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    return [AlbumListening.from_dict(entry) for entry in data.get("albums", [])]
+    return decode_albums(path.read_bytes())
@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import heapq
 import json
 import logging
-from io import TextIOWrapper
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, groupby
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Iterable
-from zipfile import ZipFile
+from typing import BinaryIO, Callable, Iterable, Iterator
+from zipfile import ZipFile, is_zipfile
 
+try:
+    import ijson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    ijson = None
+
+from . import _json
 from .models import AlbumListening
 
 LOGGER = logging.getLogger(__name__)
+MS_PER_MINUTE = 60000.0
+_JSON_ERRORS: tuple[type[Exception], ...] = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson else ())
+
+STREAMING_THRESHOLD = 32 * 1024 * 1024
+# Starting worker processes costs a few hundred milliseconds, about what parsing this much JSON takes.
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+Source = Path | BinaryIO
+"""An archive or JSON file on disk, or an already open binary stream holding one."""
 
 SUPPORTED_JSON_SUFFIXES = tuple(
     suffix.lower()
@@ -21,44 +41,91 @@ SUPPORTED_JSON_SUFFIXES = tuple(
 )
 
 
-def _iter_json_streams(path: Path) -> Iterable[dict]:
-    if path.suffix.lower() == ".json":
-        with path.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-            if isinstance(data, list):
-                for entry in data:
-                    if isinstance(entry, dict):
-                        yield entry
-            else:
-                LOGGER.debug("Ignoring non list JSON file %s", path)
+def _iter_json_array(handle: BinaryIO, source: str, size: int | None = None) -> Iterator[dict]:
+    """Yield the entries of a top-level JSON array of objects.
+
+    Documents larger than ``STREAMING_THRESHOLD`` bytes (or of unknown size)
+    are streamed when ``ijson`` is installed; smaller ones are decoded at
+    once, with ``orjson`` if available, which is several times faster.
+    History exports are homogeneous, so only the first entry is type-checked.
+    """
+
+    if ijson is not None and (size is None or size > STREAMING_THRESHOLD):
+        entries = ijson.items(handle, "item", use_float=True)
+        first = next(entries, None)
+        if first is None:
+            return
+        if not isinstance(first, dict):
+            LOGGER.debug("Ignoring JSON file %s without object entries", source)
+            return
+        yield first
+        yield from entries
         return
 
-    if path.suffix.lower() == ".zip":
-        with ZipFile(path) as archive:
-            for name in archive.namelist():
-                lowered = name.lower()
-                if not lowered.endswith(".json"):
-                    continue
-                if not any(suffix in lowered for suffix in SUPPORTED_JSON_SUFFIXES):
-                    continue
-                with archive.open(name) as handle:
-                    wrapper = TextIOWrapper(handle, encoding="utf-8")
-                    try:
-                        data = json.load(wrapper)
-                    except json.JSONDecodeError as exc:  # pragma: no cover - logging branch
-                        LOGGER.warning("Failed to parse %s from %s: %s", name, path, exc)
-                        continue
-                    if isinstance(data, list):
-                        for entry in data:
-                            if isinstance(entry, dict):
-                                yield entry
-                    else:  # pragma: no cover - logging branch
-                        LOGGER.debug("Ignoring non list JSON file %s inside %s", name, path)
-    else:
-        raise ValueError(f"Unsupported archive format: {path}")
+    data = _json.loads(handle.read())
+    if not isinstance(data, list) or (data and not isinstance(data[0], dict)):
+        LOGGER.debug("Ignoring non list JSON file %s", source)
+        return
+    yield from data
+
+
+def _iter_zip_members(source: Source) -> Iterator[str]:
+    with ZipFile(source) as archive:
+        for name in archive.namelist():
+            lowered = name.lower()
+            if not lowered.endswith(".json"):
+                continue
+            if not any(suffix in lowered for suffix in SUPPORTED_JSON_SUFFIXES):
+                continue
+            yield name
+
+
+def _iter_documents(source: Source) -> Iterator[tuple[Source, str | None]]:
+    """Yield ``(source, member)`` for every JSON document to parse; ``member`` is ``None`` for plain JSON.
+
+    Uploads are stored under whatever name the client sent, so the ZIP
+    signature rather than the file suffix decides how a source is read.
+    """
+
+    is_archive = is_zipfile(source)
+    if not isinstance(source, Path):
+        source.seek(0)
+    if not is_archive:
+        yield source, None
+        return
+    for name in _iter_zip_members(source):
+        yield source, name
+
+
+def _iter_document_entries(source: Source, member: str | None) -> Iterator[dict]:
+    if member is None:
+        if not isinstance(source, Path):
+            size = source.seek(0, os.SEEK_END)
+            source.seek(0)
+            yield from _iter_json_array(source, "uploaded stream", size)
+            return
+        with source.open("rb") as handle:
+            yield from _iter_json_array(handle, str(source), os.fstat(handle.fileno()).st_size)
+        return
+
+    with ZipFile(source) as archive, archive.open(member) as handle:
+        try:
+            yield from _iter_json_array(handle, f"{member} inside {source}", archive.getinfo(member).file_size)
+        except _JSON_ERRORS as exc:  # pragma: no cover - logging branch
+            LOGGER.warning("Failed to parse %s from %s: %s", member, source, exc)
+
 
+def _document_size(document: tuple[Path, str | None]) -> int:
+    """Uncompressed size in bytes of a JSON document on disk."""
 
-def _extract_album_entry(entry: dict) -> tuple[str | None, str | None, str | None, float]:
+    source, member = document
+    if member is None:
+        return source.stat().st_size
+    with ZipFile(source) as archive:
+        return archive.getinfo(member).file_size
+
+
+def _extract_album_entry(entry: dict) -> tuple[str | None, str | None, str | None, int]:
     album = (
         entry.get("master_metadata_album_album_name")
         or entry.get("albumName")
@@ -75,32 +142,118 @@ def _extract_album_entry(entry: dict) -> tuple[str | None, str | None, str | Non
         or entry.get("trackName")
         or entry.get("track")
     )
-    ms_played = (
-        entry.get("ms_played")
-        or entry.get("msPlayed")
-        or entry.get("ms_played")
-        or entry.get("ms_played")
-    )
-    minutes = float(ms_played or 0) / 60000.0
-    return album, artist, track, minutes
+    ms_played = entry.get("ms_played") or entry.get("msPlayed")
+    return album, artist, track, int(ms_played or 0)
 
 
-def aggregate_archives(paths: Iterable[Path]) -> list[AlbumListening]:
-    totals: dict[tuple[str, str], AlbumListening] = {}
+def _extract_extended_history_entry(entry: dict) -> tuple[str | None, str | None, str | None, int]:
+    album = entry.get("master_metadata_album_album_name")
+    artist = entry.get("master_metadata_album_artist_name")
+    if not album or not artist:
+        return _extract_album_entry(entry)
+    return album, artist, entry.get("master_metadata_track_name"), int(entry.get("ms_played") or 0)
 
-    for path in paths:
-        for entry in _iter_json_streams(path):
-            album, artist, track, minutes = _extract_album_entry(entry)
-            if not album or not artist or minutes <= 0:
-                continue
-            key = (album.strip(), artist.strip())
-            if key not in totals:
-                totals[key] = AlbumListening(album=key[0], artist=key[1], minutes=0.0)
-            totals[key].minutes += minutes
+
+def _extract_account_history_entry(entry: dict) -> tuple[str | None, str | None, str | None, int]:
+    album = entry.get("albumName")
+    artist = entry.get("artistName")
+    if not album or not artist:
+        return _extract_album_entry(entry)
+    return album, artist, entry.get("trackName"), int(entry.get("msPlayed") or 0)
+
+
+def _select_extractor(first_entry: dict) -> Callable[[dict], tuple[str | None, str | None, str | None, int]]:
+    """Pick an extractor for a whole document from its first entry.
+
+    The specialised extractors read the keys of one known export layout and
+    fall back to :func:`_extract_album_entry` for entries that do not match.
+    """
+
+    if "master_metadata_album_album_name" in first_entry:
+        return _extract_extended_history_entry
+    if "albumName" in first_entry:
+        return _extract_account_history_entry
+    return _extract_album_entry
+
+
+def _iter_plays(document: tuple[Source, str | None]) -> Iterator[tuple[str, str, str | None, int]]:
+    entries = _iter_document_entries(*document)
+    first = next(entries, None)
+    if first is None:
+        return
+    extract = _select_extractor(first)
+    for entry in chain((first,), entries):
+        album, artist, track, ms_played = extract(entry)
+        if not album or not artist or ms_played <= 0:
+            continue
+        yield album, artist, track, ms_played
+
+
+def _aggregate_one(document: tuple[Source, str | None]) -> list[tuple[tuple[str, str], int, set[str]]]:
+    """Aggregate one JSON document into ``((album, artist), played_ms, tracks)`` rows sorted by key.
+
+    Plain tuples and sets keep the result cheap to pickle back from worker
+    processes, and the ordering lets partial results be merged as streams.
+    """
+
+    totals: dict[tuple[str, str], list] = {}
+    # Histories are chronological and albums are usually played through, so
+    # consecutive plays share a key: look the bucket up once per run, not per play.
+    for (album, artist), run in groupby(_iter_plays(document), key=itemgetter(0, 1)):
+        key = (album.strip(), artist.strip())
+        played = 0
+        run_tracks: list[str] = []
+        for _, _, track, ms_played in run:
+            played += ms_played
             if track:
-                totals[key].tracks.add(track)
+                run_tracks.append(track)
+        bucket = totals.get(key)
+        if bucket is None:
+            totals[key] = [played, set(run_tracks)]
+        else:
+            bucket[0] += played
+            bucket[1].update(run_tracks)
+    return sorted(((key, played, tracks) for key, (played, tracks) in totals.items()), key=itemgetter(0))
+
+
+def aggregate_archives(
+    paths: Iterable[Source], minimum_minutes: float = 0.0, parallel: bool = True
+) -> list[AlbumListening]:
+    """Aggregate listening time per album, most listened first.
+
+    ``paths`` may mix files on disk with open binary streams; streams are
+    parsed in this process, files are spread over worker processes once they
+    add up to more than ``PARALLEL_THRESHOLD`` bytes of JSON, unless
+    ``parallel`` is false. Albums below ``minimum_minutes`` are dropped
+    before sorting, so only the survivors are ordered.
+    """
+
+    # Every JSON document, including each history file inside a ZIP, is a separate unit of work.
+    documents = [document for source in paths for document in _iter_documents(source)]
+    on_disk = [document for document in documents if isinstance(document[0], Path)]
+    in_memory = [document for document in documents if not isinstance(document[0], Path)]
+    workers = min(len(on_disk), os.cpu_count() or 1) if parallel else 1
+    if workers > 1 and sum(map(_document_size, on_disk)) > PARALLEL_THRESHOLD:
+        # Spawned workers start clean: forking a threaded caller can copy locks held by other threads.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            partials = list(executor.map(_aggregate_one, on_disk))
+    else:
+        partials = [_aggregate_one(document) for document in on_disk]
+    partials.extend(_aggregate_one(document) for document in in_memory)
 
-    return sorted(totals.values(), key=lambda item: item.minutes, reverse=True)
+    albums: list[AlbumListening] = []
+    for (album, artist), rows in groupby(heapq.merge(*partials, key=itemgetter(0)), key=itemgetter(0)):
+        _, ms_played, tracks = next(rows)
+        for _, more_ms, more_tracks in rows:
+            ms_played += more_ms
+            tracks |= more_tracks
+        # Sum exact integer milliseconds and convert once per album instead of once per entry.
+        minutes = ms_played / MS_PER_MINUTE
+        if minutes >= minimum_minutes:
+            albums.append(AlbumListening(album=album, artist=artist, minutes=minutes, tracks=tracks))
+    albums.sort(key=attrgetter("minutes"), reverse=True)
+    return albums
 
 
 def filter_by_minutes(albums: Iterable[AlbumListening], minimum_minutes: float) -> list[AlbumListening]:
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import logging
+import os
 import re
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date
-from typing import Iterable, Optional
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import chain, islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from .models import AlbumListening
 
@@ -14,18 +24,174 @@ LOGGER = logging.getLogger(__name__)
 
 MUSICBRAINZ_ENDPOINT = "https://musicbrainz.org/ws/2/release-group/"
 USER_AGENT = "AlbumBirthdays/1.0 (example@example.com)"
+MAX_WORKERS = 8
+BATCH_SIZE = 20
+CACHE_PATH: Path | None = None
+"""Where the MusicBrainz disk cache lives; ``None`` resolves it from the environment on first use."""
+MISS_TTL_SECONDS = 30 * 24 * 60 * 60
+MAX_RETRIES = 4
+RETRY_STATUSES = frozenset({429, 503})
 _CACHE: dict[tuple[str, str], tuple[Optional[str], Optional[date]]] = {}
+_CACHE_LOCK = threading.RLock()
+_DB: sqlite3.Connection | None = None
+_DB_UNAVAILABLE = False
+_DEFERRED_COMMITS = 0
 
 _EDITION_KEYWORDS = "deluxe|expanded|extended|edition|version|remaster|remastered|anniversary|bonus|special|super"
-_BRACKET_PATTERNS = [
+_BRACKET_PATTERNS = (
     re.compile(rf"\s*\([^)]*(?:{_EDITION_KEYWORDS})[^)]*\)", re.IGNORECASE),
     re.compile(rf"\s*\[[^\]]*(?:{_EDITION_KEYWORDS})[^\]]*\]", re.IGNORECASE),
     re.compile(rf"\s*\{{[^}}]*(?:{_EDITION_KEYWORDS})[^}}]*\}}", re.IGNORECASE),
-]
+)
 _SUFFIX_PATTERN = re.compile(
     rf"\s*[-:–—]\s*[^-:–—]*(?:{_EDITION_KEYWORDS})[^-:–—]*$",
     re.IGNORECASE,
 )
+_WHITESPACE_RUN = re.compile(r"\s{2,}")
+
+
+class _RateLimiter:
+    """Space out calls so that at most one request starts per ``interval`` seconds across threads."""
+
+    def __init__(self, interval: float) -> None:
+        self._interval = max(interval, 0.0)
+        self._lock = threading.Lock()
+        self._next_allowed_at = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            delay = self._next_allowed_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_allowed_at = time.monotonic() + self._interval
+
+    def backoff(self, attempt: int, retry_after: float | None) -> None:
+        """Hold back every worker after the server asked us to slow down."""
+
+        delay = retry_after if retry_after is not None else max(self._interval, 1.0) * 2**attempt
+        with self._lock:
+            self._next_allowed_at = max(self._next_allowed_at, time.monotonic() + delay)
+
+
+def _cache_path() -> Path:
+    """``CACHE_PATH``, or ``$ALBUM_ANALYZER_CACHE``, or ``mb_cache.sqlite`` under the XDG cache home."""
+
+    if CACHE_PATH is not None:
+        return CACHE_PATH
+    override = os.environ.get("ALBUM_ANALYZER_CACHE")
+    if override:
+        return Path(override)
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home) if cache_home else Path.home() / ".cache"
+    return base / "album_analyzer" / "mb_cache.sqlite"
+
+
+def _connect_disk_cache() -> sqlite3.Connection | None:
+    global _DB, _DB_UNAVAILABLE
+    if _DB is not None or _DB_UNAVAILABLE:
+        return _DB
+    try:
+        # Path.home() raises RuntimeError when no home directory can be determined.
+        path = _cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS mb ("
+            "album TEXT, artist TEXT, mbid TEXT, release_date TEXT, fetched_at INTEGER, "
+            "PRIMARY KEY(album, artist))"
+        )
+        connection.commit()
+    except (OSError, RuntimeError, sqlite3.Error) as exc:
+        LOGGER.warning("MusicBrainz disk cache is unavailable: %s", exc)
+        _DB_UNAVAILABLE = True
+        return None
+    _DB = connection
+    return _DB
+
+
+def _commit_disk_cache(connection: sqlite3.Connection) -> None:
+    try:
+        connection.commit()
+    except sqlite3.Error as exc:
+        # Usually another process holding the write lock; this run keeps its results in memory.
+        LOGGER.warning("Could not write the MusicBrainz disk cache: %s", exc)
+        connection.rollback()
+
+
+def _close_disk_cache() -> None:
+    global _DB, _DB_UNAVAILABLE
+    with _CACHE_LOCK:
+        if _DB is not None:
+            _commit_disk_cache(_DB)
+            _DB.close()
+        _DB = None
+        _DB_UNAVAILABLE = False
+
+
+def _cache_get(key: tuple[str, str]) -> tuple[Optional[str], Optional[date]] | None:
+    """Return a cached lookup from memory, falling back to the on-disk store."""
+
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            return _CACHE[key]
+        connection = _connect_disk_cache()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT mbid, release_date, fetched_at FROM mb WHERE album=? AND artist=?", key
+            ).fetchone()
+        except sqlite3.Error as exc:
+            LOGGER.warning("Could not read the MusicBrainz disk cache: %s", exc)
+            return None
+        if row is None:
+            return None
+        mbid, raw_date, fetched_at = row
+        if raw_date is None and time.time() - (fetched_at or 0) > MISS_TTL_SECONDS:
+            return None
+        result = (mbid, date.fromisoformat(raw_date) if raw_date else None)
+        _CACHE[key] = result
+        return result
+
+
+def _cache_put(key: tuple[str, str], result: tuple[Optional[str], Optional[date]]) -> None:
+    with _CACHE_LOCK:
+        _CACHE[key] = result
+        connection = _connect_disk_cache()
+        if connection is None:
+            return
+        musicbrainz_id, release_date = result
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO mb (album, artist, mbid, release_date, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (*key, musicbrainz_id, release_date.isoformat() if release_date else None, int(time.time())),
+            )
+        except sqlite3.Error as exc:
+            LOGGER.warning("Could not write the MusicBrainz disk cache: %s", exc)
+            return
+        if not _DEFERRED_COMMITS:
+            _commit_disk_cache(connection)
+
+
+@contextmanager
+def _deferred_commit() -> Iterator[None]:
+    """Group disk cache writes into a single transaction committed on exit.
+
+    The transaction holds SQLite's write lock, so keep network requests out of it.
+    """
+
+    global _DEFERRED_COMMITS
+    with _CACHE_LOCK:
+        _DEFERRED_COMMITS += 1
+    try:
+        yield
+    finally:
+        with _CACHE_LOCK:
+            _DEFERRED_COMMITS -= 1
+            if not _DEFERRED_COMMITS and _DB is not None:
+                _commit_disk_cache(_DB)
 
 
 def _parse_release_date(raw: str | None) -> Optional[date]:
@@ -44,26 +210,27 @@ def _parse_release_date(raw: str | None) -> Optional[date]:
     return None
 
 
+@lru_cache(maxsize=4096)
 def _strip_edition_suffixes(title: str) -> str:
+    # Brackets first: a trailing "- ... edition" must not swallow an earlier bracketed keyword.
+    previous = None
     cleaned = title
-    changed = True
-    while changed:
-        changed = False
+    while cleaned != previous:
+        previous = cleaned
         for pattern in _BRACKET_PATTERNS:
-            updated = pattern.sub("", cleaned)
-            if updated != cleaned:
-                cleaned = updated
-                changed = True
-        updated = _SUFFIX_PATTERN.sub("", cleaned)
-        if updated != cleaned:
-            cleaned = updated
-            changed = True
-    cleaned = re.sub(r"\s{2,}", " ", cleaned)
+            cleaned = pattern.sub("", cleaned)
+    previous = None
+    while cleaned != previous:
+        previous = cleaned
+        cleaned = _SUFFIX_PATTERN.sub("", cleaned)
+    cleaned = _WHITESPACE_RUN.sub(" ", cleaned)
     return cleaned.strip(" -:–—")
 
 
-def _title_variants(album: str) -> list[str]:
-    variants: list[str] = []
+def _title_variants(album: str) -> list[tuple[str, str]]:
+    """Return ``(title, lowered title)`` pairs to try, most specific first."""
+
+    variants: list[tuple[str, str]] = []
     seen: set[str] = set()
     for candidate in (album.strip(), _strip_edition_suffixes(album).strip()):
         if not candidate:
@@ -72,28 +239,75 @@ def _title_variants(album: str) -> list[str]:
         if lowered in seen:
             continue
         seen.add(lowered)
-        variants.append(candidate)
-    return variants or [album]
+        variants.append((candidate, lowered))
+    return variants or [(album, album.lower())]
+
+
+def _create_session(pool_size: int = 1) -> requests.Session:
+    """Return a session that keeps up to ``pool_size`` MusicBrainz connections alive for reuse."""
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
+def _quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
 
-def _perform_lookup(session: requests.Session, album: str, artist: str) -> tuple[Optional[str], Optional[date]]:
+
+def _retry_after(response: requests.Response) -> float | None:
+    """Seconds to wait according to ``Retry-After`` or MusicBrainz' ``X-RateLimit-*`` headers."""
+
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0.0)
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+def _request_release_groups(
+    session: requests.Session, query: str, limit: int, limiter: _RateLimiter | None = None
+) -> list[dict]:
     params = {
         "fmt": "json",
-        "limit": 5,
-        "query": f'release:"{album}" AND artist:"{artist}"',
+        "limit": limit,
+        "query": query,
     }
-    response = session.get(
-        MUSICBRAINZ_ENDPOINT,
-        params=params,
-        headers={"User-Agent": USER_AGENT},
-        timeout=30,
-    )
+    limiter = limiter or _RateLimiter(0.0)
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        response = session.get(
+            MUSICBRAINZ_ENDPOINT,
+            params=params,
+            headers={"User-Agent": USER_AGENT},
+            timeout=30,
+        )
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        LOGGER.info("MusicBrainz answered %s, backing off (attempt %d)", response.status_code, attempt + 1)
+        limiter.backoff(attempt, _retry_after(response))
     response.raise_for_status()
-    payload = response.json()
+    return response.json().get("release-groups", [])
+
 
+def _earliest_release(groups: Iterable[dict]) -> tuple[Optional[str], Optional[date]]:
     best_id: Optional[str] = None
     best_date: Optional[date] = None
-    for item in payload.get("release-groups", []):
+    for item in groups:
         current_date = _parse_release_date(item.get("first-release-date"))
         if current_date and (not best_date or current_date < best_date):
             best_date = current_date
@@ -101,59 +315,158 @@ def _perform_lookup(session: requests.Session, album: str, artist: str) -> tuple
     return best_id, best_date
 
 
-def lookup_release(album: str, artist: str, session: requests.Session | None = None) -> tuple[Optional[str], Optional[date]]:
-    cache_key = (album.lower(), artist.lower())
-    if cache_key in _CACHE:
-        return _CACHE[cache_key]
+def _perform_lookup(
+    session: requests.Session, album: str, artist: str, limiter: _RateLimiter | None = None
+) -> tuple[Optional[str], Optional[date]]:
+    query = f"release:{_quote(album)} AND artist:{_quote(artist)}"
+    groups = _request_release_groups(session, query, limit=5, limiter=limiter)
+    return _earliest_release(groups)
+
+
+def _credited_artists(item: dict) -> set[str]:
+    names: set[str] = set()
+    phrase = ""
+    for credit in item.get("artist-credit") or []:
+        if not isinstance(credit, dict):
+            continue
+        name = credit.get("name") or (credit.get("artist") or {}).get("name") or ""
+        artist_name = (credit.get("artist") or {}).get("name")
+        for candidate in (name, artist_name):
+            if candidate:
+                names.add(candidate.lower())
+        phrase += name + (credit.get("joinphrase") or "")
+    if phrase:
+        names.add(phrase.lower())
+    return names
+
+
+def _perform_batch_lookup(
+    session: requests.Session, pairs: list[tuple[str, str]], limiter: _RateLimiter | None = None
+) -> list[tuple[Optional[str], Optional[date]]]:
+    """Resolve several albums with one OR query, matching groups back by exact title and artist."""
+
+    query = " OR ".join(f"(release:{_quote(album)} AND artist:{_quote(artist)})" for album, artist in pairs)
+    groups = _request_release_groups(session, query, limit=min(len(pairs) * 5, 100), limiter=limiter)
+
+    keys = [(album.lower(), artist.lower()) for album, artist in pairs]
+    wanted = set(keys)
+    matches: dict[tuple[str, str], list[dict]] = {}
+    for item in groups:
+        title = (item.get("title") or "").lower()
+        for artist_name in _credited_artists(item):
+            if (title, artist_name) in wanted:
+                matches.setdefault((title, artist_name), []).append(item)
+    return [_earliest_release(matches.get(key, [])) for key in keys]
+
+
+def lookup_release(
+    album: str,
+    artist: str,
+    session: requests.Session | None = None,
+    limiter: _RateLimiter | None = None,
+) -> tuple[Optional[str], Optional[date]]:
+    artist_key = artist.lower()
+    cache_key = (album.lower(), artist_key)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
 
     created_session = False
     if session is None:
-        session = requests.Session()
+        session = _create_session()
         created_session = True
 
     try:
         best_result: tuple[Optional[str], Optional[date]] = (None, None)
-        for candidate in _title_variants(album):
-            candidate_key = (candidate.lower(), artist.lower())
-            if candidate_key in _CACHE:
-                result = _CACHE[candidate_key]
-            else:
-                result = _perform_lookup(session, candidate, artist)
-                _CACHE[candidate_key] = result
+        for candidate, candidate_lower in _title_variants(album):
+            candidate_key = (candidate_lower, artist_key)
+            result = _cache_get(candidate_key)
+            if result is None:
+                result = _perform_lookup(session, candidate, artist, limiter)
+                _cache_put(candidate_key, result)
             if result[1]:
                 best_result = result
                 break
             if best_result == (None, None):
                 best_result = result
-        _CACHE[cache_key] = best_result
+        _cache_put(cache_key, best_result)
         return best_result
     finally:
         if created_session:
             session.close()
 
 
+def _iter_batches(items: list[AlbumListening], size: int) -> Iterator[list[AlbumListening]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
 def enrich_with_release_dates(
     albums: Iterable[AlbumListening],
     pause_seconds: float = 1.1,
     session: requests.Session | None = None,
+    max_workers: int = MAX_WORKERS,
+    batch_size: int = BATCH_SIZE,
 ) -> list[AlbumListening]:
-    enriched: list[AlbumListening] = []
+    """Fill in release dates using a small thread pool.
+
+    Albums are resolved ``batch_size`` at a time with a single OR query; the
+    ones the batch could not match exactly fall back to :func:`lookup_release`
+    and its title variants. Lookups overlap their network latency, while a
+    shared rate limiter keeps at most one MusicBrainz request per
+    ``pause_seconds`` across all workers. Throttled responses (429/503) are
+    retried after ``Retry-After`` or an exponential backoff that pauses every
+    worker, not just the one that was refused.
+    """
+
     album_list = list(albums)
-    for index, album in enumerate(album_list):
-        if album.release_date:
-            enriched.append(album)
-            continue
+    pending = [album for album in album_list if not album.release_date]
+    if not pending:
+        return album_list
+
+    limiter = _RateLimiter(pause_seconds)
+    created_session = False
+    if session is None:
+        session = _create_session(max_workers)
+        created_session = True
+
+    def fetch_one(album: AlbumListening) -> tuple[Optional[str], Optional[date]]:
         try:
-            musicbrainz_id, release_date = lookup_release(album.album, album.artist, session=session)
+            return lookup_release(album.album, album.artist, session=session, limiter=limiter)
         except requests.RequestException as exc:  # pragma: no cover - network failure
             LOGGER.warning("Failed to fetch release date for %s - %s: %s", album.artist, album.album, exc)
-            enriched.append(album)
-            continue
-        if release_date:
-            album.release_date = release_date
-        if musicbrainz_id:
-            album.musicbrainz_id = musicbrainz_id
-        enriched.append(album)
-        if pause_seconds and index < len(album_list) - 1:
-            time.sleep(pause_seconds)
-    return enriched
+            return None, None
+
+    def fetch_batch(batch: list[AlbumListening]) -> list[tuple[Optional[str], Optional[date]]]:
+        keys = [(album.album.lower(), album.artist.lower()) for album in batch]
+        results = [_cache_get(key) for key in keys]
+        uncached = [index for index, result in enumerate(results) if result is None]
+
+        if len(uncached) > 1:
+            pairs = [(batch[index].album, batch[index].artist) for index in uncached]
+            try:
+                found = _perform_batch_lookup(session, pairs, limiter)
+            except requests.RequestException as exc:  # pragma: no cover - network failure
+                LOGGER.warning("Batch release lookup failed, retrying albums one by one: %s", exc)
+                found = [(None, None)] * len(pairs)
+            with _deferred_commit():
+                for index, result in zip(uncached, found):
+                    if result[1]:
+                        results[index] = result
+                        _cache_put(keys[index], result)
+
+        return [result if result is not None else fetch_one(album) for album, result in zip(batch, results)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+            resolved = chain.from_iterable(executor.map(fetch_batch, _iter_batches(pending, max(batch_size, 1))))
+            for album, (musicbrainz_id, release_date) in zip(pending, resolved):
+                if release_date:
+                    album.release_date = release_date
+                if musicbrainz_id:
+                    album.musicbrainz_id = musicbrainz_id
+    finally:
+        if created_session:
+            session.close()
+    return album_list
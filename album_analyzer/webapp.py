@@ -2,17 +2,23 @@
 
 from __future__ import annotations
 
+import gzip
+import hashlib
 import io
+import logging
+import os
+import re
+import socket
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from tempfile import TemporaryDirectory, mkstemp
+from typing import IO, Callable
 
-from flask import Flask, Response, render_template_string, request, send_file
-from werkzeug.utils import secure_filename
+from flask import Flask, Request, Response, g, request, send_file
 
-from .exporter import serialize_albums
-from .parser import aggregate_archives, filter_by_minutes
-from .release_date import enrich_with_release_dates
+from .exporter import encode_albums
+from .parser import aggregate_archives
 
+LOGGER = logging.getLogger(__name__)
 
 INDEX_TEMPLATE = r"""
 <!doctype html>
@@ -216,81 +222,179 @@ def _parse_float(value: str | None, fallback: float) -> float:
         raise ValueError("Некорректное числовое значение") from exc
 
 
+IN_MEMORY_UPLOAD_LIMIT = 8 * 1024 * 1024
+GZIP_MIN_SIZE = 16 * 1024
+# Only the extension of an upload matters: it tells the parser how to read the file.
+_UPLOAD_SUFFIX = re.compile(r"\.[A-Za-z0-9]{1,10}$")
+
+
+class _UploadRequest(Request):
+    """Request that writes uploaded files straight into ``upload_dir`` once it is set.
+
+    The parsed uploads already sit on disk under their own names, so they are
+    neither spooled to an anonymous temporary file nor copied again with ``save()``.
+    Requests smaller than ``IN_MEMORY_UPLOAD_LIMIT`` are kept in memory instead.
+    """
+
+    upload_dir: Path | None = None
+
+    def _get_file_stream(
+        self,
+        total_content_length: int | None,
+        content_type: str | None,
+        filename: str | None = None,
+        content_length: int | None = None,
+    ) -> IO[bytes]:
+        if self.upload_dir is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        if total_content_length is not None and total_content_length < IN_MEMORY_UPLOAD_LIMIT:
+            return io.BytesIO()
+        match = _UPLOAD_SUFFIX.search(filename or "")
+        suffix = match.group(0) if match else ""
+        handle, name = mkstemp(suffix=suffix, prefix="upload_", dir=self.upload_dir)
+        os.close(handle)
+        return open(name, "w+b")
+
+
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.request_class = _UploadRequest
+
+    @app.before_request
+    def _prepare_upload_dir() -> None:
+        if request.method == "POST":
+            g.upload_dir = TemporaryDirectory()
+            request.upload_dir = Path(g.upload_dir.name)
+
+    @app.teardown_request
+    def _remove_upload_dir(exc: BaseException | None) -> None:
+        upload_dir = g.pop("upload_dir", None)
+        if upload_dir is None:
+            return
+        for items in request.files.listvalues():
+            for item in items:
+                item.close()
+        upload_dir.cleanup()
+
+    index_template = app.jinja_env.from_string(INDEX_TEMPLATE)
+    # The form page only changes when a POST fails, so the plain GET is rendered once.
+    default_page = index_template.render(error=None, min_minutes="60", pause="1.1", fetch_release_dates=True)
+    default_etag = hashlib.sha1(default_page.encode("utf-8")).hexdigest()
+
+    def _page(body: str) -> Response:
+        response = Response(body, mimetype="text/html")
+        response.headers["Cache-Control"] = "no-store"
+        return response
 
     @app.route("/", methods=["GET", "POST"])
-    def index() -> str | Response:
+    def index() -> Response:
+        if request.method != "POST":
+            # Browsers may keep the static form but must revalidate; a matching ETag answers 304.
+            response = Response(default_page, mimetype="text/html")
+            response.set_etag(default_etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
+
         error: str | None = None
         min_minutes_raw = request.form.get("min_minutes", "60")
         pause_raw = request.form.get("pause", "1.1")
-        fetch_release_dates = request.form.get("fetch_release_dates") == "on" if request.method == "POST" else True
+        fetch_release_dates = request.form.get("fetch_release_dates") == "on"
         min_minutes = 60.0
         pause = 1.1
 
-        if request.method == "POST":
+        try:
+            min_minutes = _parse_float(min_minutes_raw or "60", 60.0)
+            if min_minutes < 0:
+                raise ValueError("Минимум минут не может быть отрицательным")
+        except ValueError as exc:
+            error = str(exc)
+        if error is None:
             try:
-                min_minutes = _parse_float(min_minutes_raw or "60", 60.0)
-                if min_minutes < 0:
-                    raise ValueError("Минимум минут не может быть отрицательным")
+                pause = _parse_float(pause_raw or "1.1", 1.1)
+                if pause < 0:
+                    raise ValueError("Пауза не может быть отрицательной")
             except ValueError as exc:
                 error = str(exc)
-            if error is None:
-                try:
-                    pause = _parse_float(pause_raw or "1.1", 1.1)
-                    if pause < 0:
-                        raise ValueError("Пауза не может быть отрицательной")
-                except ValueError as exc:
-                    error = str(exc)
-
-            uploaded_files = []
-            if error is None:
-                uploaded_files = [
-                    item for item in request.files.getlist("archives") if item and item.filename
+
+        uploaded_files = []
+        if error is None:
+            uploaded_files = [
+                item for item in request.files.getlist("archives") if item and item.filename
+            ]
+            if not uploaded_files:
+                error = "Загрузите хотя бы один архив или JSON-файл."
+
+        if error is None:
+            try:
+                # Large uploads were streamed into the request's upload directory while
+                # parsing; small ones stayed in memory and are read straight from there.
+                sources = [
+                    Path(item.stream.name) if hasattr(item.stream, "name") else item.stream
+                    for item in uploaded_files
                 ]
-                if not uploaded_files:
-                    error = "Загрузите хотя бы один архив или JSON-файл."
-
-            if error is None:
-                try:
-                    with TemporaryDirectory() as temp_dir:
-                        temp_path = Path(temp_dir)
-                        saved_paths: list[Path] = []
-                        for index, item in enumerate(uploaded_files):
-                            filename = secure_filename(item.filename) or f"upload_{index}"
-                            destination = temp_path / filename
-                            item.save(destination)
-                            saved_paths.append(destination)
-                        albums = aggregate_archives(saved_paths)
-                        filtered = filter_by_minutes(albums, minimum_minutes=min_minutes)
-                        if fetch_release_dates:
-                            filtered = enrich_with_release_dates(filtered, pause_seconds=pause)
-                        payload = serialize_albums(filtered)
-                except Exception as exc:  # pragma: no cover - runtime guard
-                    error = f"Ошибка при обработке данных: {exc}"
-                else:
-                    buffer = io.BytesIO(payload.encode("utf-8"))
-                    buffer.seek(0)
-                    return send_file(
-                        buffer,
-                        mimetype="application/json",
-                        as_attachment=True,
-                        download_name="albums.json",
-                    )
-
-        return render_template_string(
-            INDEX_TEMPLATE,
-            error=error,
-            min_minutes=min_minutes_raw or "60",
-            pause=pause_raw or "1.1",
-            fetch_release_dates=fetch_release_dates,
+                # Requests run on server threads, and concurrent uploads must not each start a process pool.
+                filtered = aggregate_archives(sources, minimum_minutes=min_minutes, parallel=False)
+                if fetch_release_dates:
+                    # Imported on demand: pages that never query MusicBrainz skip loading requests.
+                    from .release_date import enrich_with_release_dates
+
+                    filtered = enrich_with_release_dates(filtered, pause_seconds=pause)
+                payload = encode_albums(filtered)
+            except Exception as exc:  # pragma: no cover - runtime guard
+                error = f"Ошибка при обработке данных: {exc}"
+            else:
+                # Album lists repeat the same names and keys, so they shrink several times over;
+                # level 1 keeps compression far cheaper than producing the payload.
+                compress = len(payload) > GZIP_MIN_SIZE and request.accept_encodings["gzip"] > 0
+                if compress:
+                    payload = gzip.compress(payload, compresslevel=1)
+                response = send_file(
+                    io.BytesIO(payload),
+                    mimetype="application/json",
+                    as_attachment=True,
+                    download_name="albums.json",
+                )
+                response.vary.add("Accept-Encoding")
+                if compress:
+                    response.headers["Content-Encoding"] = "gzip"
+                return response
+
+        return _page(
+            index_template.render(
+                error=error,
+                min_minutes=min_minutes_raw or "60",
+                pause=pause_raw or "1.1",
+                fetch_release_dates=fetch_release_dates,
+            )
         )
 
     return app
 
 
-def main() -> None:  # pragma: no cover - entry point for manual runs
-    create_app().run(host="127.0.0.1", port=5000, debug=False)
+def _make_server(app: Flask, sock: socket.socket) -> Callable[[], None]:
+    """Wrap the listening ``sock`` in a server for ``app`` and return the callable that serves forever."""
+
+    try:
+        # waitress serves from a fixed pool of worker threads; Werkzeug's server is the fallback.
+        from waitress import create_server
+    except ModuleNotFoundError:  # pragma: no cover - optional dependency
+        from werkzeug.serving import make_server
+
+        host, port = sock.getsockname()[:2]
+        return make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever
+    return create_server(app, sockets=[sock], threads=4).run
+
+
+def main(sock: socket.socket | None = None) -> None:  # pragma: no cover - entry point for manual runs
+    """Serve the app on ``sock`` (by default http://127.0.0.1:5000)."""
+
+    logging.basicConfig(level=logging.INFO)
+    if sock is None:
+        sock = socket.create_server(("127.0.0.1", 5000))
+    serve_forever = _make_server(create_app(), sock)
+    # Neither server announces itself when handed a bound socket, so log the address here.
+    LOGGER.info("Serving on http://%s:%s", *sock.getsockname()[:2])
+    serve_forever()
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from calendar import isleap
 from dataclasses import dataclass
-from datetime import date
-from typing import Iterable, List
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import AbstractSet, Dict, FrozenSet, Iterable, Iterator, List, Tuple
 
 from album_analyzer.models import AlbumListening
 
@@ -15,16 +17,21 @@ class UpcomingBirthday:
     days_until: int
 
 
-def _replace_year(source: date, year: int) -> date:
+@lru_cache(maxsize=65536)
+def _replace_year_cached(year: int, month: int, day: int) -> date:
     try:
-        return source.replace(year=year)
+        return date(year, month, day)
     except ValueError:
         # Handle February 29 releases by falling back to February 28
-        if source.month == 2 and source.day == 29:
+        if month == 2 and day == 29:
             return date(year, 2, 28)
         raise
 
 
+def _replace_year(source: date, year: int) -> date:
+    return _replace_year_cached(year, source.month, source.day)
+
+
 def next_birthday(release_date: date, today: date | None = None) -> date:
     today = today or date.today()
     candidate = _replace_year(release_date, today.year)
@@ -33,22 +40,65 @@ def next_birthday(release_date: date, today: date | None = None) -> date:
     return candidate
 
 
+@lru_cache(maxsize=8)
+def _birthday_window(today: date, within_days: int) -> Dict[Tuple[int, int], Tuple[date, int]]:
+    """Map ``(month, day)`` to the first anniversary on or after ``today`` and the days until it.
+
+    Only dates at most ``within_days`` ahead are included; February 29
+    releases are celebrated on February 28 in non-leap years.
+    """
+
+    window: Dict[Tuple[int, int], Tuple[date, int]] = {}
+    # Every anniversary falls within a year, so longer windows add nothing.
+    for offset in range(max(min(within_days, 366), -1) + 1):
+        day = today + timedelta(days=offset)
+        window.setdefault((day.month, day.day), (day, offset))
+        if day.month == 2 and day.day == 28 and not isleap(day.year):
+            window.setdefault((2, 29), (day, offset))
+    return window
+
+
+@lru_cache(maxsize=8)
+def _selected_days_window(today: date, days: FrozenSet[int]) -> Dict[Tuple[int, int], Tuple[date, int]]:
+    window = _birthday_window(today, max(days))
+    return {key: value for key, value in window.items() if value[1] in days}
+
+
+def _iter_birthdays(
+    albums: Iterable[AlbumListening], window: Dict[Tuple[int, int], Tuple[date, int]]
+) -> Iterator[UpcomingBirthday]:
+    for album in albums:
+        release_date = album.release_date
+        if not release_date:
+            continue
+        found = window.get((release_date.month, release_date.day))
+        if found is None:
+            continue
+        next_day, days_until = found
+        age = next_day.year - release_date.year
+        yield UpcomingBirthday(album=album, next_date=next_day, age=age, days_until=days_until)
+
+
+def iter_upcoming_birthdays(
+    albums: Iterable[AlbumListening],
+    today: date | None = None,
+    days_of_interest: AbstractSet[int] = frozenset({0}),
+) -> Iterator[UpcomingBirthday]:
+    """Yield, unsorted, the birthdays exactly ``days_of_interest`` days away."""
+
+    if not days_of_interest:
+        return iter(())
+    window = _selected_days_window(today or date.today(), frozenset(days_of_interest))
+    return _iter_birthdays(albums, window)
+
+
 def calculate_upcoming_birthdays(
     albums: Iterable[AlbumListening],
     today: date | None = None,
     within_days: int = 30,
 ) -> List[UpcomingBirthday]:
     today = today or date.today()
-    upcoming: List[UpcomingBirthday] = []
-    for album in albums:
-        if not album.release_date:
-            continue
-        next_day = next_birthday(album.release_date, today)
-        days_until = (next_day - today).days
-        if days_until > within_days:
-            continue
-        age = next_day.year - album.release_date.year
-        upcoming.append(UpcomingBirthday(album=album, next_date=next_day, age=age, days_until=days_until))
+    upcoming = list(_iter_birthdays(albums, _birthday_window(today, within_days)))
     upcoming.sort(key=lambda item: (item.days_until, item.album.artist, item.album.album))
     return upcoming
 
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import re
+import zlib
+from collections import OrderedDict
 from datetime import date, time, timezone
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     Application,
     ApplicationBuilder,
@@ -16,27 +21,63 @@ from telegram.ext import (
     filters,
 )
 
-from album_analyzer.exporter import load_albums
+from album_analyzer.exporter import decode_albums
 from album_analyzer.models import AlbumListening
 
-from .birthdays import calculate_upcoming_birthdays, format_birthday_message
+from .birthdays import (
+    UpcomingBirthday,
+    calculate_upcoming_birthdays,
+    format_birthday_message,
+    iter_upcoming_birthdays,
+)
 from .storage import (
-    DATA_DIR,
+    AlbumsVersion,
+    NotificationKey,
+    append_notification_log,
     iter_users,
     load_notification_log,
     load_user_albums,
-    save_notification_log,
-    save_user_albums,
+    save_user_albums_raw,
+    user_albums_version,
 )
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_WITHIN_DAYS = 30
 UPCOMING_NOTIFICATIONS = (7, 1)
 UPCOMING_DAY_PRESETS = (7, 30, 90)
+UPCOMING_VIEWS_LIMIT = 10
+NOTIFICATION_CONCURRENCY = 32
+# Telegram allows a bot about 30 messages per second overall; stay a little below that.
+NOTIFICATIONS_PER_SECOND = 25
+NOTIFICATION_ATTEMPTS = 3
+NOTIFICATION_RETRY_DELAY = 5.0
+JSON_SUFFIXES = (".json", ".json.gz")
+# Telegram lets bots download up to 20 MB; anything expanding far beyond that is not an album list.
+MAX_DECOMPRESSED_SIZE = 64 * 1024 * 1024
+
+
+@lru_cache(maxsize=256)
+def _cached_upcoming_events(
+    chat_id: int, within_days: int, today: date, version: AlbumsVersion
+) -> Tuple[UpcomingBirthday, ...]:
+    albums = load_user_albums(chat_id)
+    return tuple(calculate_upcoming_birthdays(albums, today=today, within_days=within_days))
+
+
+def _upcoming_events(chat_id: int, within_days: int) -> Tuple[UpcomingBirthday, ...]:
+    """Upcoming events for a chat, recomputed only when the day, range or saved albums change."""
+
+    version = user_albums_version(chat_id)
+    if version is None:
+        return ()
+    return _cached_upcoming_events(chat_id, within_days, date.today(), version)
+
+
+UpcomingViews = OrderedDict[int, Dict[str, Any]]
 
 
-def _get_upcoming_views(context: ContextTypes.DEFAULT_TYPE) -> Dict[int, Dict[str, Any]]:
-    return context.user_data.setdefault("upcoming_views", {})
+def _get_upcoming_views(context: ContextTypes.DEFAULT_TYPE) -> UpcomingViews:
+    return context.user_data.setdefault("upcoming_views", OrderedDict())
 
 
 def _build_upcoming_message(view: Dict[str, Any]) -> str:
@@ -52,31 +93,40 @@ def _build_upcoming_message(view: Dict[str, Any]) -> str:
     return f"{header}\n{position}\n\n{format_birthday_message(current)}"
 
 
+def _day_preset_row(selected: int | None) -> list[InlineKeyboardButton]:
+    return [
+        InlineKeyboardButton(
+            f"• {preset} дн." if preset == selected else f"{preset} дн.",
+            callback_data=f"upcoming:days:{preset}",
+        )
+        for preset in UPCOMING_DAY_PRESETS
+    ]
+
+
+# Everything but the navigation row is static, so those buttons are built once and shared.
+_DAY_ROWS = {selected: _day_preset_row(selected) for selected in (*UPCOMING_DAY_PRESETS, None)}
+_PREV_BUTTON = InlineKeyboardButton("⬅️ Назад", callback_data="upcoming:prev")
+_NEXT_BUTTON = InlineKeyboardButton("Вперёд ➡️", callback_data="upcoming:next")
+_EMPTY_ROW = [InlineKeyboardButton("Нет событий", callback_data="upcoming:noop")]
+_CLOSE_ROW = [InlineKeyboardButton("Закрыть", callback_data="upcoming:close")]
+
+
 def _build_upcoming_keyboard(view: Dict[str, Any]) -> InlineKeyboardMarkup:
     events = view["events"]
     index = view.get("index", 0)
     total = len(events)
-    rows: list[list[InlineKeyboardButton]] = []
 
     if total:
         navigation: list[InlineKeyboardButton] = []
         if index > 0:
-            navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data="upcoming:prev"))
+            navigation.append(_PREV_BUTTON)
         navigation.append(InlineKeyboardButton(f"{index + 1}/{total}", callback_data="upcoming:noop"))
         if index < total - 1:
-            navigation.append(InlineKeyboardButton("Вперёд ➡️", callback_data="upcoming:next"))
-        rows.append(navigation)
+            navigation.append(_NEXT_BUTTON)
     else:
-        rows.append([InlineKeyboardButton("Нет событий", callback_data="upcoming:noop")])
-
-    day_buttons = []
-    for preset in UPCOMING_DAY_PRESETS:
-        label = f"• {preset} дн." if preset == view["days"] else f"{preset} дн."
-        day_buttons.append(InlineKeyboardButton(label, callback_data=f"upcoming:days:{preset}"))
-    rows.append(day_buttons)
+        navigation = _EMPTY_ROW
 
-    rows.append([InlineKeyboardButton("Закрыть", callback_data="upcoming:close")])
-    return InlineKeyboardMarkup(rows)
+    return InlineKeyboardMarkup([navigation, _DAY_ROWS.get(view["days"], _DAY_ROWS[None]), _CLOSE_ROW])
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text(
@@ -93,8 +143,12 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 
 def _summarize_albums(albums: list[AlbumListening]) -> str:
-    total_minutes = sum(album.minutes for album in albums)
-    with_dates = sum(1 for album in albums if album.release_date)
+    total_minutes = 0.0
+    with_dates = 0
+    for album in albums:
+        total_minutes += album.minutes
+        if album.release_date:
+            with_dates += 1
     return (
         f"Загружено {len(albums)} альбомов.\n"
         f"Общее время прослушивания: {int(total_minutes)} минут.\n"
@@ -102,28 +156,44 @@ def _summarize_albums(albums: list[AlbumListening]) -> str:
     )
 
 
+def _gunzip(data: bytes | bytearray, limit: int = MAX_DECOMPRESSED_SIZE) -> bytes | None:
+    """Decompress a gzip upload, or return ``None`` if it expands beyond ``limit`` bytes."""
+
+    decompressor = zlib.decompressobj(wbits=31)
+    result = decompressor.decompress(data, limit + 1)
+    if len(result) > limit:
+        return None
+    if not decompressor.eof:
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+    return result
+
+
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.message.document:
         return
     document = update.message.document
-    if not document.file_name.endswith(".json"):
+    file_name = (document.file_name or "").lower()
+    if not file_name.endswith(JSON_SUFFIXES):
         await update.message.reply_text("Ожидаю JSON файл, созданный приложением.")
         return
 
     chat_id = update.message.chat_id
     file = await document.get_file()
-    temp_path = DATA_DIR / f"{chat_id}_upload.json"
-    await file.download_to_drive(custom_path=temp_path)
+    data = await file.download_as_bytearray()
     try:
-        albums = load_albums(temp_path)
+        if file_name.endswith(".gz"):
+            data = _gunzip(data)
+            if data is None:
+                await update.message.reply_text("Файл слишком большой после распаковки.")
+                return
+        albums = decode_albums(data)
     except Exception as exc:  # pragma: no cover - parsing guard
         LOGGER.exception("Failed to parse uploaded file from %s", chat_id)
         await update.message.reply_text(f"Не удалось прочитать файл: {exc}")
-        temp_path.unlink(missing_ok=True)
         return
 
-    save_user_albums(chat_id, albums)
-    temp_path.unlink(missing_ok=True)
+    # The upload is already in the storage format and has just been validated, so keep it as is.
+    save_user_albums_raw(chat_id, data)
     await update.message.reply_text("Файл сохранён. " + _summarize_albums(albums))
 
 
@@ -139,28 +209,86 @@ async def upcoming(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         days = int(context.args[0]) if context.args else DEFAULT_WITHIN_DAYS
     except ValueError:
         days = DEFAULT_WITHIN_DAYS
-    view: Dict[str, Any] = {"days": days, "events": calculate_upcoming_birthdays(albums, within_days=days), "index": 0}
+    view: Dict[str, Any] = {"days": days, "events": _upcoming_events(chat_id, days), "index": 0}
     text = _build_upcoming_message(view)
     markup = _build_upcoming_keyboard(view)
     sent_message = await update.message.reply_text(text, reply_markup=markup)
     views = _get_upcoming_views(context)
     views[sent_message.message_id] = view
-    # keep last few views to avoid unbounded growth
-    if len(views) > 10:
-        for message_id in list(views)[:-10]:
-            views.pop(message_id, None)
+    # keep the most recently used views to avoid unbounded growth
+    while len(views) > UPCOMING_VIEWS_LIMIT:
+        views.popitem(last=False)
+
+
+_CALLBACK_PATTERN = re.compile(r"^upcoming:(noop|close|prev|next|days)(?::(\d+))?$")
+
+
+async def _upcoming_noop(query: CallbackQuery, views: UpcomingViews, view: Dict[str, Any], days: int | None) -> bool:
+    await query.answer()
+    return False
+
+
+async def _upcoming_close(query: CallbackQuery, views: UpcomingViews, view: Dict[str, Any], days: int | None) -> bool:
+    message = query.message
+    views.pop(message.message_id, None)
+    await query.answer()
+    try:
+        await message.delete()
+    except Exception:  # pragma: no cover - network issues
+        await query.edit_message_reply_markup(reply_markup=None)
+    return False
+
+
+async def _upcoming_prev(query: CallbackQuery, views: UpcomingViews, view: Dict[str, Any], days: int | None) -> bool:
+    if view["events"] and view["index"] > 0:
+        view["index"] -= 1
+        return True
+    await query.answer("Это первая запись.")
+    return False
+
+
+async def _upcoming_next(query: CallbackQuery, views: UpcomingViews, view: Dict[str, Any], days: int | None) -> bool:
+    if view["events"] and view["index"] < len(view["events"]) - 1:
+        view["index"] += 1
+        return True
+    await query.answer("Это последняя запись.")
+    return False
+
+
+async def _upcoming_days(query: CallbackQuery, views: UpcomingViews, view: Dict[str, Any], days: int | None) -> bool:
+    if days is None:
+        await query.answer("Некорректный диапазон.", show_alert=True)
+        return False
+    if days == view["days"]:
+        await query.answer()
+        return False
+    chat_id = query.message.chat_id
+    if not load_user_albums(chat_id):
+        await query.answer("Сначала загрузите файл с альбомами.", show_alert=True)
+        return False
+    view["days"] = days
+    view["events"] = _upcoming_events(chat_id, days)
+    view["index"] = 0
+    return True
+
+
+# Each action either updates the view and returns True, or answers the query itself and returns False.
+_UPCOMING_ACTIONS: Dict[str, Callable[..., Awaitable[bool]]] = {
+    "noop": _upcoming_noop,
+    "close": _upcoming_close,
+    "prev": _upcoming_prev,
+    "next": _upcoming_next,
+    "days": _upcoming_days,
+}
 
 
 async def handle_upcoming_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     if not query or not query.data:
         return
-    parts = query.data.split(":")
-    if not parts or parts[0] != "upcoming":
-        await query.answer()
-        return
+    match = _CALLBACK_PATTERN.match(query.data)
     message = query.message
-    if not message:
+    if not match or not message:
         await query.answer()
         return
 
@@ -169,99 +297,70 @@ async def handle_upcoming_callback(update: Update, context: ContextTypes.DEFAULT
     if not view:
         await query.answer("Список устарел, используйте /upcoming заново.", show_alert=True)
         return
+    views.move_to_end(message.message_id)
 
-    action = parts[1] if len(parts) > 1 else ""
-    if action == "noop":
-        await query.answer()
-        return
-    if action == "close":
-        views.pop(message.message_id, None)
-        await query.answer()
-        try:
-            await message.delete()
-        except Exception:  # pragma: no cover - network issues
-            await query.edit_message_reply_markup(reply_markup=None)
-        return
-
-    updated = False
-    if action == "prev":
-        if view["events"] and view["index"] > 0:
-            view["index"] -= 1
-            updated = True
-        else:
-            await query.answer("Это первая запись.")
-            return
-    elif action == "next":
-        if view["events"] and view["index"] < len(view["events"]) - 1:
-            view["index"] += 1
-            updated = True
-        else:
-            await query.answer("Это последняя запись.")
-            return
-    elif action == "days" and len(parts) > 2:
-        try:
-            new_days = int(parts[2])
-        except ValueError:
-            await query.answer("Некорректный диапазон.", show_alert=True)
-            return
-        if new_days == view["days"]:
-            await query.answer()
-            return
-        albums = load_user_albums(message.chat_id)
-        if not albums:
-            await query.answer("Сначала загрузите файл с альбомами.", show_alert=True)
-            return
-        view["days"] = new_days
-        view["events"] = calculate_upcoming_birthdays(albums, within_days=new_days)
-        view["index"] = 0
-        updated = True
-    else:
-        await query.answer()
+    action, days = match.groups()
+    if not await _UPCOMING_ACTIONS[action](query, views, view, int(days) if days else None):
         return
-
-    if updated:
-        text = _build_upcoming_message(view)
-        markup = _build_upcoming_keyboard(view)
-        await query.edit_message_text(text=text, reply_markup=markup)
+    text = _build_upcoming_message(view)
+    markup = _build_upcoming_keyboard(view)
+    await query.edit_message_text(text=text, reply_markup=markup)
     await query.answer()
 
 
-async def _notify_user(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message: str) -> None:
+async def _notify_user(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message: str) -> bool:
     try:
         await context.bot.send_message(chat_id=chat_id, text=message)
     except Exception as exc:  # pragma: no cover - network errors
         LOGGER.warning("Failed to notify %s: %s", chat_id, exc)
+        return False
+    return True
 
 
 async def send_daily_notifications(context: ContextTypes.DEFAULT_TYPE) -> None:
     today = date.today()
+    today_iso = today.isoformat()
     days_before = context.job.data.get("days_before", UPCOMING_NOTIFICATIONS) if context.job else UPCOMING_NOTIFICATIONS
-    within_days = max(days_before + (0,))
-    log = load_notification_log()
-    changed = False
-    for chat_id in iter_users():
-        albums = load_user_albums(chat_id)
+    days_of_interest = frozenset((0, *days_before))
+    # Only today's entries can suppress a send, so older ones are pruned while loading.
+    log = load_notification_log(since=today)
+    log_get = log.get
+    pending: Dict[NotificationKey, tuple[int, str]] = {}
+    # Album files are read and parsed in worker threads so the event loop keeps serving updates.
+    chat_ids = list(iter_users())
+    album_lists = await asyncio.gather(*(asyncio.to_thread(load_user_albums, chat_id) for chat_id in chat_ids))
+    for chat_id, albums in zip(chat_ids, album_lists):
         if not albums:
             continue
-        events = calculate_upcoming_birthdays(albums, today=today, within_days=within_days)
-        for event in events:
-            key_base = f"{chat_id}|{event.album.artist}|{event.album.album}|{event.next_date.year}"
-            if event.days_until == 0:
-                key = f"{key_base}|day"
-                if log.get(key) == today.isoformat():
-                    continue
-                await _notify_user(context, chat_id, format_birthday_message(event))
-                log[key] = today.isoformat()
-                changed = True
-            elif event.days_until in days_before:
-                key = f"{key_base}|{event.days_until}"
-                if log.get(key) == today.isoformat():
-                    continue
-                await _notify_user(context, chat_id, format_birthday_message(event))
-                log[key] = today.isoformat()
-                changed = True
-    if changed:
-        save_notification_log(log)
+        for event in iter_upcoming_birthdays(albums, today=today, days_of_interest=days_of_interest):
+            kind: int | str = "day" if event.days_until == 0 else event.days_until
+            key = (chat_id, event.album.artist, event.album.album, event.next_date.year, kind)
+            if log_get(key) == today_iso or key in pending:
+                continue
+            pending[key] = (chat_id, format_birthday_message(event))
+    if not pending:
+        return
+
+    # Sends overlap their round trips to Telegram; starts are staggered to respect its rate
+    # limit and the semaphore bounds how many requests are in flight at once.
+    semaphore = asyncio.Semaphore(NOTIFICATION_CONCURRENCY)
+
+    async def send(index: int, chat_id: int, message: str) -> bool:
+        await asyncio.sleep(index / NOTIFICATIONS_PER_SECOND)
+        for attempt in range(NOTIFICATION_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(NOTIFICATION_RETRY_DELAY * 2 ** (attempt - 1))
+            async with semaphore:
+                if await _notify_user(context, chat_id, message):
+                    return True
+        return False
+
+    delivered = await asyncio.gather(
+        *(send(index, chat_id, message) for index, (chat_id, message) in enumerate(pending.values()))
+    )
+    # Events move on by tomorrow, so a send that failed every attempt is dropped; it stays out of
+    # the log only so that a rerun today, e.g. the startup check after a restart, tries it again.
+    append_notification_log({key: today_iso for key, sent in zip(pending, delivered) if sent})
 
 
 def build_application(token: str) -> Application:
@@ -270,7 +369,12 @@ def build_application(token: str) -> Application:
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("upcoming", upcoming))
     application.add_handler(CallbackQueryHandler(handle_upcoming_callback, pattern=r"^upcoming:"))
-    application.add_handler(MessageHandler(filters.Document.FileExtension("json"), handle_document))
+    application.add_handler(
+        MessageHandler(
+            filters.Document.FileExtension("json") | filters.Document.FileExtension("json.gz"),
+            handle_document,
+        )
+    )
     application.job_queue.run_daily(
         send_daily_notifications,
         time=time(hour=0, minute=0, tzinfo=timezone.utc),
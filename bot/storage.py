@@ -1,41 +1,116 @@
 from __future__ import annotations
 
 import json
+import threading
+from collections import OrderedDict
+from datetime import date
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, List
+from typing import Dict, Iterable, Iterator, Tuple, Union
 
+from album_analyzer import _json
 from album_analyzer.exporter import load_albums
 from album_analyzer.models import AlbumListening
 
 DATA_DIR = Path("bot_data")
-DATA_DIR.mkdir(exist_ok=True)
+
+AlbumsVersion = Tuple[int, int]
+"""``(mtime_ns, revision)`` of a chat's albums file; the revision counts saves made by this process."""
+
+_ALBUMS_CACHE: OrderedDict[int, Tuple[AlbumsVersion, Tuple[AlbumListening, ...]]] = OrderedDict()
+_ALBUMS_CACHE_MAX = 128
+_ALBUMS_CACHE_LOCK = threading.Lock()
+_REVISIONS: Dict[int, int] = {}
+_KNOWN_USERS: set[int] | None = None
+
+NotificationKey = Tuple[int, str, str, int, Union[int, str]]
+"""``(chat_id, artist, album, year, days_before)``; ``days_before`` is ``"day"`` on the birthday itself."""
+
+
+def _ensure_data_dir() -> None:
+    # Created on the first write, so that importing this module leaves the filesystem alone.
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def _user_file(chat_id: int) -> Path:
     return DATA_DIR / f"{chat_id}.json"
 
 
+def _users_index_file() -> Path:
+    return DATA_DIR / "users.idx"
+
+
 def _notifications_file() -> Path:
+    return DATA_DIR / "notifications.jsonl"
+
+
+def _legacy_notifications_file() -> Path:
     return DATA_DIR / "notifications.json"
 
 
 def save_user_albums(chat_id: int, albums: Iterable[AlbumListening]) -> Path:
-    path = _user_file(chat_id)
     payload = {
         "albums": [album.to_dict() for album in albums],
     }
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return path
+    return save_user_albums_raw(chat_id, _json.dumps(payload))
+
 
+def save_user_albums_raw(chat_id: int, data: bytes | bytearray) -> Path:
+    """Store an already encoded albums payload, e.g. a validated upload, without re-serialising it."""
 
-def load_user_albums(chat_id: int) -> List[AlbumListening]:
+    _ensure_data_dir()
     path = _user_file(chat_id)
-    if not path.exists():
-        return []
-    return load_albums(path)
+    temp_path = path.with_suffix(".json.tmp")
+    temp_path.write_bytes(data)
+    temp_path.replace(path)
+    with _ALBUMS_CACHE_LOCK:
+        _ALBUMS_CACHE.pop(chat_id, None)
+        # Coarse filesystem timestamps may not move between two quick uploads.
+        _REVISIONS[chat_id] = _REVISIONS.get(chat_id, 0) + 1
+    users = _known_users()
+    if chat_id not in users:
+        with _users_index_file().open("a", encoding="utf-8") as handle:
+            handle.write(f"{chat_id}\n")
+        users.add(chat_id)
+    return path
 
 
-def iter_users() -> Iterator[int]:
+def user_albums_version(chat_id: int) -> AlbumsVersion | None:
+    """Return a token that changes whenever the chat's albums are replaced, or ``None`` without albums."""
+
+    try:
+        mtime = _user_file(chat_id).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return mtime, _REVISIONS.get(chat_id, 0)
+
+
+def load_user_albums(chat_id: int) -> Tuple[AlbumListening, ...]:
+    """Return the chat's albums, reusing the parsed list while the file is unchanged.
+
+    The tuple is shared between callers; the albums in it must not be modified.
+    Safe to call from worker threads.
+    """
+
+    version = user_albums_version(chat_id)
+    with _ALBUMS_CACHE_LOCK:
+        if version is None:
+            _ALBUMS_CACHE.pop(chat_id, None)
+            return ()
+        cached = _ALBUMS_CACHE.get(chat_id)
+        if cached is not None and cached[0] == version:
+            _ALBUMS_CACHE.move_to_end(chat_id)
+            return cached[1]
+    # Parse outside the lock so that several chats can be loaded at once.
+    albums = tuple(load_albums(_user_file(chat_id)))
+    with _ALBUMS_CACHE_LOCK:
+        _ALBUMS_CACHE[chat_id] = (version, albums)
+        _ALBUMS_CACHE.move_to_end(chat_id)
+        if len(_ALBUMS_CACHE) > _ALBUMS_CACHE_MAX:
+            _ALBUMS_CACHE.popitem(last=False)
+    return albums
+
+
+def _scan_users() -> Iterator[int]:
     for file in DATA_DIR.glob("*.json"):
         if file.name == "notifications.json":
             continue
@@ -45,12 +120,109 @@ def iter_users() -> Iterator[int]:
             continue
 
 
-def load_notification_log() -> Dict[str, str]:
-    path = _notifications_file()
-    if not path.exists():
-        return {}
-    return json.loads(path.read_text(encoding="utf-8"))
+def _known_users() -> set[int]:
+    """Chat ids with saved albums, read from ``users.idx`` once per process."""
+
+    global _KNOWN_USERS
+    if _KNOWN_USERS is None:
+        path = _users_index_file()
+        if path.exists():
+            _KNOWN_USERS = {int(line) for line in path.read_text(encoding="utf-8").split()}
+        else:
+            # Data directories from older versions have no index yet: build it from the files once.
+            _KNOWN_USERS = set(_scan_users())
+            if DATA_DIR.is_dir():
+                temp_path = path.with_suffix(".idx.tmp")
+                temp_path.write_text("".join(f"{chat_id}\n" for chat_id in _KNOWN_USERS), encoding="utf-8")
+                temp_path.replace(path)
+    return _KNOWN_USERS
+
+
+def iter_users() -> Iterator[int]:
+    yield from list(_known_users())
 
 
-def save_notification_log(log: Dict[str, str]) -> None:
-    _notifications_file().write_text(json.dumps(log, ensure_ascii=False, indent=2), encoding="utf-8")
+def _legacy_notification_key(key: str) -> NotificationKey | None:
+    parts = key.split("|")
+    if len(parts) != 5:
+        # An artist or album containing "|" cannot be split back reliably.
+        return None
+    chat_id, artist, album, year, kind = parts
+    try:
+        return int(chat_id), artist, album, int(year), kind if kind == "day" else int(kind)
+    except ValueError:
+        return None
+
+
+def _load_legacy_notification_log(path: Path) -> Dict[NotificationKey, str]:
+    log: Dict[NotificationKey, str] = {}
+    for key, value in _json.loads(path.read_bytes()).items():
+        converted = _legacy_notification_key(key)
+        if converted is not None:
+            log[converted] = value
+    return log
+
+
+def load_notification_log(since: date | None = None) -> Dict[NotificationKey, str]:
+    """Read the log, letting later lines override earlier ones for the same key.
+
+    Entries recorded before ``since`` are dropped. The file is compacted
+    once dropped or superseded lines outnumber the live entries. A
+    ``notifications.json`` from older versions is migrated on first load.
+    """
+
+    since_iso = since.isoformat() if since else ""
+    path = _notifications_file()
+    if not path.exists():
+        legacy = _legacy_notifications_file()
+        if not legacy.exists():
+            return {}
+        log = {key: value for key, value in _load_legacy_notification_log(legacy).items() if value >= since_iso}
+        save_notification_log(log)
+        legacy.unlink()
+        return log
+
+    log = {}
+    lines = 0
+    with path.open("rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            # Malformed lines count too, so that compaction gets rid of them.
+            lines += 1
+            try:
+                row = _json.loads(line)
+            except json.JSONDecodeError:  # torn write from a crash
+                continue
+            if not isinstance(row, list) or len(row) != 6 or not isinstance(row[-1], str):
+                continue
+            # ISO dates compare correctly as strings.
+            if row[-1] >= since_iso:
+                log[tuple(row[:-1])] = row[-1]
+    if lines > 2 * len(log):
+        save_notification_log(log)
+    return log
+
+
+def _encode_notification(key: NotificationKey, value: str) -> bytes:
+    # JSON objects only take string keys, so each entry is stored as a ``[*key, date]`` line.
+    return _json.dumps([*key, value]) + b"\n"
+
+
+def append_notification_log(entries: Dict[NotificationKey, str]) -> None:
+    """Record new log entries without rewriting the existing ones."""
+
+    if not entries:
+        return
+    _ensure_data_dir()
+    with _notifications_file().open("ab") as handle:
+        handle.writelines(_encode_notification(key, value) for key, value in entries.items())
+
+
+def save_notification_log(log: Dict[NotificationKey, str]) -> None:
+    _ensure_data_dir()
+    path = _notifications_file()
+    temp_path = path.with_suffix(".jsonl.tmp")
+    with temp_path.open("wb") as handle:
+        handle.writelines(_encode_notification(key, value) for key, value in log.items())
+    temp_path.replace(path)
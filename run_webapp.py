@@ -1,26 +1,41 @@
 """Entry point for bundling the web UI into a standalone executable."""
 from __future__ import annotations
 
+import multiprocessing
+import socket
 import threading
 import webbrowser
 
-from album_analyzer.webapp import main as webapp_main
+HOST = "127.0.0.1"
+PORT = 5000
 
 
 def _open_browser() -> None:
     """Open the local application page in the default browser."""
     try:
-        webbrowser.open("http://127.0.0.1:5000", new=0, autoraise=True)
-    except Exception:
-        # Browser availability is platform-specific; ignore any errors here.
+        webbrowser.open(f"http://{HOST}:{PORT}", new=0, autoraise=True)
+    except (webbrowser.Error, OSError):
+        # Browser availability is platform-specific; the URL is logged on startup anyway.
         pass
 
 
+def _open_browser_in_background() -> None:
+    threading.Thread(target=_open_browser, daemon=True).start()
+
+
 def main() -> None:
-    """Start the web application and open the browser window."""
-    threading.Timer(1.0, _open_browser).start()
-    webapp_main()
+    """Start the web application and open the browser window once it is listening."""
+    # Listen before importing Flask: the browser starts up while the web stack loads,
+    # and its first request waits in the socket backlog until the app serves it.
+    sock = socket.create_server((HOST, PORT))
+    _open_browser_in_background()
+
+    from album_analyzer.webapp import main as webapp_main
+
+    webapp_main(sock=sock)
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution
+    # Archive parsing uses worker processes, which frozen executables must bootstrap here.
+    multiprocessing.freeze_support()
     main()
@@ -1,6 +1,31 @@
 import sys
+from collections import OrderedDict
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from album_analyzer import release_date
+from bot import storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_release_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    release_date._close_disk_cache()
+    monkeypatch.setattr(release_date, "CACHE_PATH", tmp_path / "mb_cache.sqlite")
+    monkeypatch.setattr(release_date, "_CACHE", {})
+    yield
+    release_date._close_disk_cache()
+
+
+@pytest.fixture
+def bot_data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    data_dir = tmp_path / "bot_data"
+    data_dir.mkdir()
+    monkeypatch.setattr(storage, "DATA_DIR", data_dir)
+    monkeypatch.setattr(storage, "_KNOWN_USERS", None)
+    monkeypatch.setattr(storage, "_ALBUMS_CACHE", OrderedDict())
+    return data_dir
@@ -1,6 +1,6 @@
 from datetime import date
 
-from bot.birthdays import calculate_upcoming_birthdays, format_birthday_message, next_birthday
+from bot.birthdays import calculate_upcoming_birthdays, format_birthday_message, iter_upcoming_birthdays, next_birthday
 from album_analyzer.models import AlbumListening
 
 
@@ -23,3 +23,23 @@ def test_calculate_upcoming_birthdays() -> None:
     message = format_birthday_message(events[0])
     assert "Album" in message
     assert "Artist" in message
+
+
+def test_calculate_upcoming_birthdays_handles_leap_day_releases() -> None:
+    albums = [AlbumListening(album="Leap", artist="Artist", minutes=5, release_date=date(2000, 2, 29))]
+
+    events = calculate_upcoming_birthdays(albums, today=date(2023, 2, 20), within_days=10)
+
+    assert [(event.next_date, event.days_until, event.age) for event in events] == [(date(2023, 2, 28), 8, 23)]
+
+
+def test_iter_upcoming_birthdays_yields_only_requested_days() -> None:
+    albums = [
+        AlbumListening(album="Today", artist="Artist", minutes=1, release_date=date(2001, 6, 1)),
+        AlbumListening(album="Soon", artist="Artist", minutes=1, release_date=date(2002, 6, 3)),
+        AlbumListening(album="Week", artist="Artist", minutes=1, release_date=date(2003, 6, 8)),
+    ]
+
+    events = iter_upcoming_birthdays(albums, today=date(2024, 6, 1), days_of_interest={0, 7})
+
+    assert sorted((event.album.album, event.days_until) for event in events) == [("Today", 0), ("Week", 7)]
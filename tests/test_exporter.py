@@ -2,7 +2,7 @@ import json
 from datetime import date
 from pathlib import Path
 
-from album_analyzer.exporter import export_albums, load_albums, serialize_albums
+from album_analyzer.exporter import decode_albums, encode_albums, export_albums, load_albums, serialize_albums
 from album_analyzer.models import AlbumListening
 
 
@@ -27,3 +27,30 @@ def test_serialize_albums() -> None:
     assert payload["albums"]
     assert payload["albums"][0]["album"] == "Album"
     assert "generated_at" in payload
+
+
+def test_export_empty_album_list(tmp_path: Path) -> None:
+    output = tmp_path / "albums.json"
+    export_albums([], output)
+
+    payload = json.loads(output.read_text(encoding="utf-8"))
+    assert payload["albums"] == []
+    assert load_albums(output) == []
+
+
+def test_encode_albums_returns_utf8_json() -> None:
+    albums = [AlbumListening(album="Альбом", artist="Artist", minutes=50.0, release_date=date(2001, 2, 3))]
+
+    encoded = encode_albums(albums)
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded)["albums"][0]["album"] == "Альбом"
+    assert json.loads(encoded)["albums"][0]["release_date"] == "2001-02-03"
+
+
+def test_decode_albums_from_downloaded_buffer() -> None:
+    albums = [AlbumListening(album="Album", artist="Artist", minutes=12.5, release_date=date(2001, 2, 3))]
+
+    decoded = decode_albums(bytearray(encode_albums(albums)))
+
+    assert [(album.album, album.release_date) for album in decoded] == [("Album", date(2001, 2, 3))]
@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+import os
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from album_analyzer.models import AlbumListening
+from bot import main, storage
+
+
+def test_gunzip_rejects_oversized_payloads() -> None:
+    payload = b'{"albums": []}'
+
+    assert main._gunzip(gzip.compress(payload)) == payload
+    assert main._gunzip(gzip.compress(payload), limit=len(payload)) == payload
+    assert main._gunzip(gzip.compress(b"0" * 1_000_000), limit=1024) is None
+
+
+class FakeBot:
+    def __init__(self, failures: dict[int, int]) -> None:
+        # How many times sending to each chat fails before it goes through.
+        self.failures = failures
+        self.sent: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append(chat_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.failures.get(chat_id, 0):
+            self.failures[chat_id] -= 1
+            raise ConnectionError("telegram is unavailable")
+
+
+def test_send_daily_notifications_logs_only_delivered(bot_data_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(main, "NOTIFICATION_CONCURRENCY", 1)
+    monkeypatch.setattr(main, "NOTIFICATIONS_PER_SECOND", 10_000)
+    monkeypatch.setattr(main, "NOTIFICATION_RETRY_DELAY", 0)
+    today = date.today()
+    album = AlbumListening(
+        album="Pinkerton", artist="Weezer", minutes=60.0, release_date=today.replace(year=today.year - 8)
+    )
+    for chat_id in (1, 2, 3, 4):
+        storage.save_user_albums(chat_id, [album])
+    storage.append_notification_log({(3, "Weezer", "Pinkerton", today.year, "day"): today.isoformat()})
+
+    bot = FakeBot(failures={2: main.NOTIFICATION_ATTEMPTS, 4: 1})
+    asyncio.run(main.send_daily_notifications(SimpleNamespace(bot=bot, job=None)))
+
+    assert sorted(bot.sent) == [1] + [2] * main.NOTIFICATION_ATTEMPTS + [4, 4]
+    assert bot.max_in_flight == 1
+    assert sorted(key[0] for key in storage.load_notification_log()) == [1, 3, 4]
+
+    retry = FakeBot(failures={})
+    asyncio.run(main.send_daily_notifications(SimpleNamespace(bot=retry, job=None)))
+
+    assert retry.sent == [2]
+    assert sorted(key[0] for key in storage.load_notification_log()) == [1, 2, 3, 4]
+
+
+def test_upcoming_events_follow_reuploads_within_one_mtime_tick(bot_data_dir: Path) -> None:
+    main._cached_upcoming_events.cache_clear()
+    today = date.today()
+    released = today.replace(year=today.year - 8)
+    storage.save_user_albums(1, [AlbumListening(album="Pinkerton", artist="Weezer", minutes=60.0, release_date=released)])
+    path = bot_data_dir / "1.json"
+    stat = path.stat()
+    assert [event.album.album for event in main._upcoming_events(1, 30)] == ["Pinkerton"]
+
+    storage.save_user_albums(1, [AlbumListening(album="Blue Album", artist="Weezer", minutes=50.0, release_date=released)])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert [event.album.album for event in main._upcoming_events(1, 30)] == ["Blue Album"]
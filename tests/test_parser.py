@@ -1,7 +1,13 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing.context import BaseContext
 from pathlib import Path
 from zipfile import ZipFile
 
+import pytest
+
+from album_analyzer import parser
 from album_analyzer.parser import aggregate_archives, filter_by_minutes
 
 
@@ -51,3 +57,75 @@ def test_aggregate_archives_spotify_zip(tmp_path: Path) -> None:
     assert album.artist == "Artist"
     assert round(album.minutes, 1) == 12.0
     assert album.tracks == {"Track One", "Track Two"}
+
+
+def test_aggregate_archives_merges_multiple_files(tmp_path: Path) -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+    archive = tmp_path / "endsong.zip"
+    with ZipFile(archive, "w") as handle:
+        handle.writestr("MyData/endsong_0.json", sample.read_text(encoding="utf-8"))
+
+    albums = aggregate_archives([sample, archive])
+
+    assert [album.album for album in albums] == ["Test Album", "Another Album"]
+    assert round(albums[0].minutes, 2) == 12.0
+    assert albums[0].tracks == {"Track One", "Track Two"}
+
+
+def test_aggregate_archives_applies_minimum_minutes() -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+
+    albums = aggregate_archives([sample], minimum_minutes=5)
+
+    assert [album.album for album in albums] == ["Test Album"]
+
+
+def test_aggregate_archives_accepts_streams() -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+    archive = BytesIO()
+    with ZipFile(archive, "w") as handle:
+        handle.writestr("MyData/endsong_0.json", sample.read_bytes())
+
+    albums = aggregate_archives([BytesIO(sample.read_bytes()), archive])
+
+    assert [album.album for album in albums] == ["Test Album", "Another Album"]
+    assert round(albums[0].minutes, 2) == 12.0
+
+
+def test_aggregate_archives_streams_large_documents(monkeypatch: pytest.MonkeyPatch) -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+    monkeypatch.setattr(parser, "STREAMING_THRESHOLD", 0)
+
+    albums = aggregate_archives([sample])
+
+    assert [album.album for album in albums] == ["Test Album", "Another Album"]
+
+
+def test_aggregate_archives_parallel_matches_serial(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+    archive = tmp_path / "my_spotify_data.zip"
+    with ZipFile(archive, "w") as handle:
+        handle.writestr("MyData/endsong_0.json", sample.read_bytes())
+        handle.writestr("MyData/endsong_1.json", sample.read_bytes())
+    sources = [sample, archive]
+    serial = aggregate_archives(sources)
+
+    pools: list[tuple[int, str]] = []
+
+    class RecordingExecutor(ProcessPoolExecutor):
+        def __init__(self, max_workers: int, mp_context: BaseContext) -> None:
+            pools.append((max_workers, mp_context.get_start_method()))
+            super().__init__(max_workers=max_workers, mp_context=mp_context)
+
+    monkeypatch.setattr(parser, "ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(parser.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(parser, "PARALLEL_THRESHOLD", 0)
+    parallel = aggregate_archives(sources)
+
+    assert pools == [(3, "spawn")]
+    assert [(album.album, album.artist, album.minutes, album.tracks) for album in parallel] == [
+        (album.album, album.artist, album.minutes, album.tracks) for album in serial
+    ]
+    assert round(parallel[0].minutes, 2) == 18.0
+    assert aggregate_archives(sources, parallel=False) == serial
+    assert len(pools) == 1
@@ -1,11 +1,19 @@
+import re
+import sqlite3
 from datetime import date
+from pathlib import Path
+
+import pytest
 
 from album_analyzer import release_date
+from album_analyzer.models import AlbumListening
 
 
 class FakeResponse:
-    def __init__(self, payload: dict) -> None:
+    def __init__(self, payload: dict, status_code: int = 200, headers: dict | None = None) -> None:
         self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self) -> None:  # pragma: no cover - no-op in tests
         return
@@ -17,7 +25,7 @@ class FakeResponse:
 class FakeSession:
     def __init__(self) -> None:
         self.calls: list[str] = []
-        self._payloads = [
+        self._payloads = iter([
             {"release-groups": []},
             {
                 "release-groups": [
@@ -27,16 +35,15 @@ class FakeSession:
                     }
                 ]
             },
-        ]
+        ])
 
     def get(self, url: str, params: dict, headers: dict, timeout: int) -> FakeResponse:
         self.calls.append(params["query"])
-        payload = self._payloads.pop(0)
+        payload = next(self._payloads)
         return FakeResponse(payload)
 
 
 def test_lookup_release_handles_deluxe_titles() -> None:
-    release_date._CACHE.clear()
     session = FakeSession()
 
     musicbrainz_id, released = release_date.lookup_release(
@@ -51,3 +58,131 @@ def test_lookup_release_handles_deluxe_titles() -> None:
         'release:"Pinkerton - Deluxe Edition" AND artist:"Weezer"',
         'release:"Pinkerton" AND artist:"Weezer"',
     ]
+
+
+@pytest.mark.parametrize(
+    ("title", "expected"),
+    [
+        (
+            "Star Wars: A New Hope (Original Motion Picture Soundtrack) [Remastered]",
+            "Star Wars: A New Hope (Original Motion Picture Soundtrack)",
+        ),
+        ("Harry Potter - The Goblet of Fire (Deluxe Edition)", "Harry Potter - The Goblet of Fire"),
+        ("Title: Subtitle (Deluxe Edition)", "Title: Subtitle"),
+        ("Pinkerton - Deluxe Edition", "Pinkerton"),
+    ],
+)
+def test_strip_edition_suffixes_keeps_subtitles(title: str, expected: str) -> None:
+    assert release_date._strip_edition_suffixes(title) == expected
+
+
+class MappingSession:
+    def __init__(self, dates: dict[str, str]) -> None:
+        self.calls: list[str] = []
+        self._dates = dates
+
+    def get(self, url: str, params: dict, headers: dict, timeout: int) -> FakeResponse:
+        self.calls.append(params["query"])
+        groups = [
+            {
+                "id": album.lower(),
+                "title": album,
+                "first-release-date": self._dates[album],
+                "artist-credit": [{"name": artist, "artist": {"name": artist}}],
+            }
+            for album, artist in re.findall(r'release:"([^"]+)" AND artist:"([^"]+)"', params["query"])
+            if album in self._dates
+        ]
+        return FakeResponse({"release-groups": groups})
+
+
+def test_enrich_with_release_dates_keeps_order() -> None:
+    albums = [
+        AlbumListening(album=f"Album {index}", artist="Artist", minutes=60.0)
+        for index in range(12)
+    ]
+    session = MappingSession({f"Album {index}": f"20{index:02d}-01-02" for index in range(0, 12, 2)})
+
+    enriched = release_date.enrich_with_release_dates(albums, pause_seconds=0, session=session)  # type: ignore[arg-type]
+
+    assert [album.album for album in enriched] == [album.album for album in albums]
+    assert enriched[0].release_date == date(2000, 1, 2)
+    assert enriched[0].musicbrainz_id == "album 0"
+    assert enriched[1].release_date is None
+    assert enriched[10].release_date == date(2010, 1, 2)
+
+
+def test_enrich_with_release_dates_batches_queries() -> None:
+    albums = [
+        AlbumListening(album="Pinkerton", artist="Weezer", minutes=60.0),
+        AlbumListening(album="Blue Album", artist="Weezer", minutes=50.0),
+        AlbumListening(album="Unknown", artist="Weezer", minutes=40.0),
+    ]
+    session = MappingSession({"Pinkerton": "1996-09-24", "Blue Album": "1994-05-10"})
+
+    release_date.enrich_with_release_dates(albums, pause_seconds=0, session=session)  # type: ignore[arg-type]
+
+    assert albums[0].release_date == date(1996, 9, 24)
+    assert albums[1].release_date == date(1994, 5, 10)
+    assert albums[2].release_date is None
+    assert session.calls == [
+        '(release:"Pinkerton" AND artist:"Weezer") OR (release:"Blue Album" AND artist:"Weezer")'
+        ' OR (release:"Unknown" AND artist:"Weezer")',
+        'release:"Unknown" AND artist:"Weezer"',
+    ]
+
+
+def test_lookup_release_uses_disk_cache() -> None:
+    session = MappingSession({"Pinkerton": "1996-09-24"})
+    first = release_date.lookup_release("Pinkerton", "Weezer", session=session)  # type: ignore[arg-type]
+
+    release_date._CACHE.clear()
+    second = release_date.lookup_release("Pinkerton", "Weezer", session=session)  # type: ignore[arg-type]
+
+    assert first == second == ("pinkerton", date(1996, 9, 24))
+    assert len(session.calls) == 1
+
+
+def test_cache_put_survives_locked_disk_cache() -> None:
+    release_date._connect_disk_cache().execute("PRAGMA busy_timeout = 0")
+    other = sqlite3.connect(release_date.CACHE_PATH)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        release_date._cache_put(("pinkerton", "weezer"), ("pinkerton", date(1996, 9, 24)))
+    finally:
+        other.rollback()
+        other.close()
+
+    assert release_date._cache_get(("pinkerton", "weezer")) == ("pinkerton", date(1996, 9, 24))
+
+
+def test_cache_path_follows_environment(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(release_date, "CACHE_PATH", None)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.delenv("ALBUM_ANALYZER_CACHE", raising=False)
+    assert release_date._cache_path() == tmp_path / "xdg" / "album_analyzer" / "mb_cache.sqlite"
+
+    monkeypatch.setenv("ALBUM_ANALYZER_CACHE", str(tmp_path / "custom.sqlite"))
+    release_date._cache_put(("pinkerton", "weezer"), ("pinkerton", date(1996, 9, 24)))
+
+    assert (tmp_path / "custom.sqlite").exists()
+
+
+class ThrottledSession:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get(self, url: str, params: dict, headers: dict, timeout: int) -> FakeResponse:
+        self.calls += 1
+        if self.calls == 1:
+            return FakeResponse({}, status_code=503, headers={"Retry-After": "0"})
+        return FakeResponse({"release-groups": [{"id": "ok", "first-release-date": "2001-03-05"}]})
+
+
+def test_lookup_release_retries_throttled_requests() -> None:
+    session = ThrottledSession()
+
+    result = release_date.lookup_release("Album", "Artist", session=session)  # type: ignore[arg-type]
+
+    assert result == ("ok", date(2001, 3, 5))
+    assert session.calls == 2
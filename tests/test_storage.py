@@ -0,0 +1,118 @@
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from album_analyzer.models import AlbumListening
+from bot import storage
+
+
+def test_load_notification_log_migrates_legacy_file(bot_data_dir: Path) -> None:
+    legacy = bot_data_dir / "notifications.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "1|Weezer|Pinkerton|1996|day": "2026-09-24",
+                "1|Weezer|Pinkerton|1996|7": "2026-09-17",
+                "1|AC|DC|Back In Black|1980|day": "2026-07-25",
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    log = storage.load_notification_log()
+
+    assert log == {
+        (1, "Weezer", "Pinkerton", 1996, "day"): "2026-09-24",
+        (1, "Weezer", "Pinkerton", 1996, 7): "2026-09-17",
+    }
+    assert not legacy.exists()
+    assert storage.load_notification_log() == log
+
+
+def test_load_notification_log_keeps_latest_entry(bot_data_dir: Path) -> None:
+    key = (1, "Weezer", "Pinkerton", 1996, "day")
+    storage.append_notification_log({key: "2025-09-24"})
+    storage.append_notification_log({key: "2026-09-24"})
+
+    assert storage.load_notification_log() == {key: "2026-09-24"}
+
+
+def test_load_notification_log_prunes_old_entries(bot_data_dir: Path) -> None:
+    old = (1, "Weezer", "Pinkerton", 1996, 7)
+    recent = (1, "Weezer", "Pinkerton", 1996, "day")
+    storage.append_notification_log({old: "2026-09-17", recent: "2026-09-24"})
+
+    assert storage.load_notification_log(since=date(2026, 9, 20)) == {recent: "2026-09-24"}
+
+
+def test_load_notification_log_compacts_superseded_lines(bot_data_dir: Path) -> None:
+    key = (1, "Weezer", "Pinkerton", 1996, "day")
+    other = (2, "Weezer", "Blue Album", 1994, "day")
+    storage.append_notification_log({other: "2026-05-10"})
+    for year in (2023, 2024, 2025, 2026):
+        storage.append_notification_log({key: f"{year}-09-24"})
+    path = bot_data_dir / "notifications.jsonl"
+    assert len(path.read_bytes().splitlines()) == 5
+
+    log = storage.load_notification_log()
+
+    assert log == {other: "2026-05-10", key: "2026-09-24"}
+    assert len(path.read_bytes().splitlines()) == 2
+    assert storage.load_notification_log() == log
+
+
+def test_load_notification_log_skips_malformed_lines(bot_data_dir: Path) -> None:
+    key = (1, "Weezer", "Pinkerton", 1996, "day")
+    storage.append_notification_log({key: "2026-09-24"})
+    with (bot_data_dir / "notifications.jsonl").open("ab") as handle:
+        handle.write(b'42\n{"a": 1}\n[]\n[1, "Weezer", "Pinker\n')
+
+    assert storage.load_notification_log() == {key: "2026-09-24"}
+    assert storage.load_notification_log() == {key: "2026-09-24"}
+
+
+def test_known_users_rebuilds_missing_index(bot_data_dir: Path) -> None:
+    (bot_data_dir / "5.json").write_text('{"albums": []}', encoding="utf-8")
+    (bot_data_dir / "7.json").write_text('{"albums": []}', encoding="utf-8")
+    (bot_data_dir / "notifications.json").write_text("{}", encoding="utf-8")
+
+    assert sorted(storage.iter_users()) == [5, 7]
+    assert sorted((bot_data_dir / "users.idx").read_text(encoding="utf-8").split()) == ["5", "7"]
+
+
+def test_save_user_albums_indexes_each_user_once(bot_data_dir: Path) -> None:
+    album = AlbumListening(album="Pinkerton", artist="Weezer", minutes=60.0)
+    storage.save_user_albums(5, [album])
+    storage.save_user_albums(5, [album])
+    storage.save_user_albums(7, [album])
+
+    assert (bot_data_dir / "users.idx").read_text(encoding="utf-8").split() == ["5", "7"]
+    storage._KNOWN_USERS = None
+    assert sorted(storage.iter_users()) == [5, 7]
+
+
+def test_save_user_albums_invalidates_cached_albums(bot_data_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Pretend the filesystem mtime does not move between the two saves.
+    monkeypatch.setattr(storage, "user_albums_version", lambda chat_id: (1, 0))
+    storage.save_user_albums(5, [AlbumListening(album="Pinkerton", artist="Weezer", minutes=60.0)])
+    assert [album.album for album in storage.load_user_albums(5)] == ["Pinkerton"]
+
+    storage.save_user_albums(5, [AlbumListening(album="Blue Album", artist="Weezer", minutes=50.0)])
+
+    assert [album.album for album in storage.load_user_albums(5)] == ["Blue Album"]
+
+
+def test_storage_creates_data_dir_on_first_write(bot_data_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = bot_data_dir / "nested"
+    monkeypatch.setattr(storage, "DATA_DIR", data_dir)
+
+    assert storage.load_user_albums(5) == ()
+    assert storage.load_notification_log() == {}
+    assert list(storage.iter_users()) == []
+    assert not data_dir.exists()
+
+    storage.save_user_albums(5, [AlbumListening(album="Pinkerton", artist="Weezer", minutes=60.0)])
+
+    assert [album.album for album in storage.load_user_albums(5)] == ["Pinkerton"]
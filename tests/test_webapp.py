@@ -1,19 +1,33 @@
+import gzip
+import json
+from io import BytesIO
+from pathlib import Path
+from zipfile import ZipFile
+
+import pytest
+from flask.testing import FlaskClient
+
+from album_analyzer import webapp
 from album_analyzer.webapp import create_app
 
 
-def test_webapp_index_get() -> None:
-    app = create_app()
-    client = app.test_client()
+@pytest.fixture(scope="module")
+def client() -> FlaskClient:
+    return create_app().test_client()
 
+
+def test_webapp_index_get(client: FlaskClient) -> None:
     response = client.get("/")
     assert response.status_code == 200
     assert "albums.json" in response.get_data(as_text=True)
+    assert response.headers["Cache-Control"] == "no-cache"
 
+    revalidated = client.get("/", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
 
-def test_webapp_requires_files() -> None:
-    app = create_app()
-    client = app.test_client()
 
+def test_webapp_requires_files(client: FlaskClient) -> None:
     response = client.post(
         "/",
         data={"min_minutes": "60", "pause": "1.1"},
@@ -23,3 +37,64 @@ def test_webapp_requires_files() -> None:
     body = response.get_data(as_text=True)
     assert response.status_code == 200
     assert "Загрузите хотя бы один архив" in body
+
+
+def test_webapp_returns_albums_json(client: FlaskClient) -> None:
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+
+    with sample.open("rb") as handle:
+        response = client.post(
+            "/",
+            data={"min_minutes": "5", "pause": "0", "archives": (handle, "endsong_0.json")},
+            content_type="multipart/form-data",
+        )
+
+    assert response.status_code == 200
+    payload = json.loads(response.get_data())
+    assert [album["album"] for album in payload["albums"]] == ["Test Album"]
+
+
+@pytest.mark.parametrize("in_memory_limit", [webapp.IN_MEMORY_UPLOAD_LIMIT, 0])
+def test_webapp_sniffs_archives_regardless_of_name(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch, in_memory_limit: int
+) -> None:
+    monkeypatch.setattr(webapp, "IN_MEMORY_UPLOAD_LIMIT", in_memory_limit)
+    sample = Path(__file__).parent / "data" / "sample_streaming.json"
+    archive = BytesIO()
+    with ZipFile(archive, "w") as handle:
+        handle.writestr("MyData/endsong_0.json", sample.read_bytes())
+    archive.seek(0)
+
+    response = client.post(
+        "/",
+        data={"min_minutes": "5", "pause": "0", "archives": (archive, "my_spotify_data")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    payload = json.loads(response.get_data())
+    assert [album["album"] for album in payload["albums"]] == ["Test Album"]
+
+
+def test_webapp_gzips_large_downloads(client: FlaskClient) -> None:
+    history = [
+        {"albumName": f"Album {index}", "artistName": "Artist", "trackName": "Track", "msPlayed": 600_000}
+        for index in range(500)
+    ]
+
+    response = client.post(
+        "/",
+        data={
+            "min_minutes": "0",
+            "pause": "0",
+            "archives": (BytesIO(json.dumps(history).encode()), "StreamingHistory0.json"),
+        },
+        content_type="multipart/form-data",
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    payload = json.loads(gzip.decompress(response.get_data()))
+    assert len(payload["albums"]) == 500